@@ -0,0 +1,123 @@
+"""
+Content-Addressable Cache for Gemini Extractions
+
+Stores extraction results in a local SQLite table keyed by a SHA-256 of
+(model, prompt version, MIME type, file bytes), so re-uploading the same
+file returns the previous result without another Gemini call.
+
+Bump the prompt version constants in file_processor.py whenever a prompt
+changes so stale entries stop matching.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv(
+    "EXTRACTION_CACHE_PATH",
+    str(Path(__file__).parent / ".extraction_cache.db")
+)
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    hash TEXT PRIMARY KEY,
+    prompt_version TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response_json TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_hash_version ON llm_cache (hash, prompt_version);
+"""
+
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialized
+    conn = sqlite3.connect(CACHE_PATH, timeout=5)
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                conn.executescript(_SCHEMA)
+                _initialized = True
+    return conn
+
+
+def _field(value: bytes) -> bytes:
+    """Length-prefix a key field so field boundaries can't collide."""
+    return len(value).to_bytes(8, "little") + value
+
+
+@lru_cache(maxsize=32)
+def _seeded_hasher(model: str, prompt_version: str, mime_type: str) -> "hashlib._Hash":
+    """Hasher with the (model, prompt version, MIME type) prefix already fed in."""
+    h = hashlib.sha256()
+    for part in (model.encode(), prompt_version.encode(), mime_type.encode()):
+        h.update(_field(part))
+    return h
+
+
+def make_key(model: str, prompt_version: str, mime_type: str, file_content: bytes) -> str:
+    """Build the cache key for a file extraction."""
+    h = _seeded_hasher(model, prompt_version, mime_type).copy()
+    h.update(len(file_content).to_bytes(8, "little"))
+    h.update(file_content)
+    return h.hexdigest()
+
+
+def get(key: str, prompt_version: str) -> Optional[dict[str, Any]]:
+    """Return the cached extraction, or None on a miss or expired entry."""
+    try:
+        with closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT response_json FROM llm_cache "
+                "WHERE hash = ? AND prompt_version = ? AND expires_at > ?",
+                (key, prompt_version, int(time.time()))
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("Extraction cache read failed: %s", e)
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def set(
+    key: str,
+    prompt_version: str,
+    model: str,
+    value: dict[str, Any],
+    ttl_seconds: int = DEFAULT_TTL_SECONDS
+) -> None:
+    """Store an extraction result."""
+    now = int(time.time())
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(hash, prompt_version, model, response_json, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, prompt_version, model, json.dumps(value), now, now + ttl_seconds)
+            )
+    except sqlite3.Error as e:
+        logger.warning("Extraction cache write failed: %s", e)
+
+
+def delete(key: str) -> None:
+    """Evict an entry (e.g. one that no longer matches the expected schema)."""
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute("DELETE FROM llm_cache WHERE hash = ?", (key,))
+    except sqlite3.Error as e:
+        logger.warning("Extraction cache delete failed: %s", e)
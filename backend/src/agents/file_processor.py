@@ -8,29 +8,84 @@ Supported file types:
 - PDF (.pdf): Processed directly by Gemini's multimodal capabilities
 - Excel (.xlsx, .xls): Read with openpyxl, converted to text for Gemini
 - Word (.docx): Read with python-docx, converted to text for Gemini
+
+Extraction results are cached by file content (see extraction_cache.py).
 """
 
-import base64
+import asyncio
+import hashlib
 import io
+import os
+import threading
+import weakref
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Final, Optional
 import json
 
 from google import genai
 from google.genai import types
+from pydantic import BaseModel
+
+from . import extraction_cache
+
+
+# Upper bound on concurrent Gemini calls per event loop (rate limit)
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+
+
+class _LoopState:
+    """Async primitives for one event loop; asyncio objects can't cross loops."""
+    __slots__ = ("semaphore", "inflight")
+
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+        # In-flight extractions keyed by (extract function, MIME type, content hash)
+        self.inflight: dict[tuple, asyncio.Task] = {}
+
+
+# Dropped together with their loop, so closed loops leave nothing behind
+_loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+_loop_states_lock = threading.Lock()
+
+
+def _loop_state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    with _loop_states_lock:
+        state = _loop_states.get(loop)
+        if state is None:
+            state = _loop_states[loop] = _LoopState()
+    return state
+
+
+# Shared Gemini client so extractions reuse its keep-alive connections
+_client: genai.Client | None = None
+_client_lock = threading.Lock()
 
 
 def get_gemini_client() -> genai.Client:
-    """Create Vertex AI Gemini client."""
-    # Uses GOOGLE_APPLICATION_CREDENTIALS or default credentials
-    return genai.Client(vertexai=True)
+    """Get the Vertex AI Gemini client (created once, thread-safe)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Uses GOOGLE_APPLICATION_CREDENTIALS or default credentials
+                _client = genai.Client(vertexai=True)
+    return _client
+
+
+@lru_cache(maxsize=8)
+def _prompt_part(extraction_prompt: str) -> types.Part:
+    """Build the prompt Part once per prompt; the prompts are module constants."""
+    return types.Part.from_text(extraction_prompt)
 
 
 def process_file_with_gemini(
     file_content: bytes,
     file_name: str,
     extraction_prompt: str,
-    model: str = "gemini-2.0-flash"
+    model: str = "gemini-2.0-flash",
+    response_schema: Optional[type[BaseModel]] = None
 ) -> dict[str, Any]:
     """
     Process a file using Vertex AI Gemini.
@@ -40,6 +95,7 @@ def process_file_with_gemini(
         file_name: Original filename (used to determine MIME type)
         extraction_prompt: Instructions for what data to extract
         model: Gemini model to use
+        response_schema: Optional Pydantic model for structured output
         
     Returns:
         Extracted data as a dictionary
@@ -55,20 +111,20 @@ def process_file_with_gemini(
         text_content = _excel_to_text(file_content)
         parts = [
             types.Part.from_text(f"Excel file content:\n\n{text_content}"),
-            types.Part.from_text(extraction_prompt)
+            _prompt_part(extraction_prompt)
         ]
     # For Word documents, convert to text
     elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
         text_content = _docx_to_text(file_content)
         parts = [
             types.Part.from_text(f"Word document content:\n\n{text_content}"),
-            types.Part.from_text(extraction_prompt)
+            _prompt_part(extraction_prompt)
         ]
     # For PDFs and other files, use Gemini's native multimodal processing
     else:
         parts = [
             types.Part.from_bytes(data=file_content, mime_type=mime_type),
-            types.Part.from_text(extraction_prompt)
+            _prompt_part(extraction_prompt)
         ]
     
     # Generate response with structured output
@@ -80,10 +136,17 @@ def process_file_with_gemini(
         ),
         config=types.GenerateContentConfig(
             response_mime_type="application/json",
+            response_schema=response_schema,
             temperature=0.1  # Low temperature for accurate extraction
         )
     )
     
+    # Structured output is already parsed by the SDK; drop nulls so
+    # missing fields stay missing like in plain JSON mode
+    parsed = response.parsed if response_schema is not None else None
+    if isinstance(parsed, BaseModel):
+        return parsed.model_dump(exclude_none=True)
+    
     # Parse JSON response
     try:
         return json.loads(response.text)
@@ -112,21 +175,27 @@ def _excel_to_text(file_content: bytes) -> str:
     try:
         import openpyxl
         
-        workbook = openpyxl.load_workbook(io.BytesIO(file_content), data_only=True)
-        text_parts = []
+        buffer = io.BytesIO(file_content)
+        # read_only streams rows from the XML instead of building every cell object
+        workbook = openpyxl.load_workbook(buffer, read_only=True, data_only=True)
         
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
-            text_parts.append(f"=== Sheet: {sheet_name} ===")
-            
-            for row in sheet.iter_rows(values_only=True):
-                row_text = "\t".join(str(cell) if cell is not None else "" for cell in row)
-                if row_text.strip():
-                    text_parts.append(row_text)
-            
-            text_parts.append("")  # Empty line between sheets
+        def iter_text():
+            for sheet in workbook.worksheets:
+                yield f"=== Sheet: {sheet.title} ==="
+                
+                for row in sheet.iter_rows(values_only=True):
+                    row_text = "\t".join(str(cell) if cell is not None else "" for cell in row)
+                    if row_text.strip():
+                        yield row_text
+                
+                yield ""  # Empty line between sheets
         
-        return "\n".join(text_parts)
+        try:
+            return "\n".join(iter_text())
+        finally:
+            # Read-only workbooks keep the archive open until closed
+            workbook.close()
+            buffer.close()
     except Exception as e:
         return f"Error reading Excel file: {e}"
 
@@ -137,29 +206,90 @@ def _docx_to_text(file_content: bytes) -> str:
         from docx import Document
         
         doc = Document(io.BytesIO(file_content))
-        text_parts = []
         
-        for para in doc.paragraphs:
-            if para.text.strip():
-                text_parts.append(para.text)
-        
-        # Also extract tables
-        for table in doc.tables:
-            text_parts.append("\n--- Table ---")
-            for row in table.rows:
-                row_text = "\t".join(cell.text for cell in row.cells)
-                text_parts.append(row_text)
+        def iter_text():
+            for para in doc.paragraphs:
+                # para.text rebuilds the string from runs, so read it once
+                text = para.text
+                if text.strip():
+                    yield text
+            
+            # Also extract tables
+            for table in doc.tables:
+                yield "\n--- Table ---"
+                for row in table.rows:
+                    yield "\t".join(cell.text for cell in row.cells)
         
-        return "\n".join(text_parts)
+        return "\n".join(iter_text())
     except Exception as e:
         return f"Error reading Word document: {e}"
 
 
+# =============================================================================
+# Extraction Schemas (structured output for Gemini)
+# =============================================================================
+
+class StaffAssignment(BaseModel):
+    staffName: Optional[str] = None
+    staffId: Optional[str] = None
+    date: Optional[str] = None
+    shiftCode: Optional[str] = None
+
+
+class SpecialRequest(BaseModel):
+    staffName: Optional[str] = None
+    date: Optional[str] = None
+    requestType: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class RotaExtraction(BaseModel):
+    startDate: Optional[str] = None
+    endDate: Optional[str] = None
+    staffAssignments: list[StaffAssignment] = []
+    specialRequests: list[SpecialRequest] = []
+    summary: Optional[str] = None
+
+
+class UnitInfo(BaseModel):
+    name: Optional[str] = None
+    department: Optional[str] = None
+    manager: Optional[str] = None
+
+
+class StaffMember(BaseModel):
+    name: Optional[str] = None
+    staffId: Optional[str] = None
+    position: Optional[str] = None
+    type: Optional[str] = None
+    contractedHours: Optional[float] = None
+    comments: Optional[str] = None
+
+
+class ShiftCodeDefinition(BaseModel):
+    code: Optional[str] = None
+    definition: Optional[str] = None
+    description: Optional[str] = None
+    hours: Optional[float] = None
+    type: Optional[str] = None
+
+
+class UnitExtraction(BaseModel):
+    unitInfo: UnitInfo = UnitInfo()
+    staff: list[StaffMember] = []
+    shiftCodes: list[ShiftCodeDefinition] = []
+    summary: Optional[str] = None
+
+
 # =============================================================================
 # ADK Tool Definitions
 # =============================================================================
 
-ROTA_EXTRACTION_PROMPT = """
+# Bump a version whenever its prompt changes so cached extractions are invalidated
+ROTA_PROMPT_VERSION = "rota-v1"
+UNIT_PROMPT_VERSION = "unit-v1"
+
+ROTA_EXTRACTION_PROMPT: Final[str] = """
 Analyze this file and extract rota/schedule information. Return a JSON object with:
 {
     "startDate": "YYYY-MM-DD or null if not found",
@@ -186,7 +316,7 @@ Analyze this file and extract rota/schedule information. Return a JSON object wi
 Extract as much information as possible. If certain fields are not present, use null.
 """
 
-UNIT_EXTRACTION_PROMPT = """
+UNIT_EXTRACTION_PROMPT: Final[str] = """
 Analyze this file and extract unit/staff configuration information. Return a JSON object with:
 {
     "unitInfo": {
@@ -220,16 +350,54 @@ Extract as much information as possible. If certain fields are not present, use
 """
 
 
+def _extract_with_cache(
+    file_content: bytes,
+    file_name: str,
+    extraction_prompt: str,
+    prompt_version: str,
+    response_schema: type[BaseModel],
+    required_keys: tuple[str, ...],
+    model: str = "gemini-2.0-flash"
+) -> dict[str, Any]:
+    """
+    Run an extraction through the content-addressable cache.
+    
+    Cached entries missing any of required_keys are evicted and re-extracted.
+    Unparseable Gemini responses are not cached.
+    """
+    key = extraction_cache.make_key(model, prompt_version, _get_mime_type(file_name), file_content)
+    
+    cached = extraction_cache.get(key, prompt_version)
+    if cached is not None:
+        if all(k in cached for k in required_keys):
+            return cached
+        extraction_cache.delete(key)
+    
+    data = process_file_with_gemini(
+        file_content=file_content,
+        file_name=file_name,
+        extraction_prompt=extraction_prompt,
+        model=model,
+        response_schema=response_schema
+    )
+    if not data.get("parse_error"):
+        extraction_cache.set(key, prompt_version, model, data)
+    return data
+
+
 def extract_rota_data(file_content: bytes, file_name: str) -> dict[str, Any]:
     """
     Extract rota/schedule data from an uploaded file.
     
     This is the main tool function called by the Rota Filling Agent.
     """
-    return process_file_with_gemini(
+    return _extract_with_cache(
         file_content=file_content,
         file_name=file_name,
-        extraction_prompt=ROTA_EXTRACTION_PROMPT
+        extraction_prompt=ROTA_EXTRACTION_PROMPT,
+        prompt_version=ROTA_PROMPT_VERSION,
+        response_schema=RotaExtraction,
+        required_keys=("staffAssignments", "specialRequests")
     )
 
 
@@ -239,8 +407,67 @@ def extract_unit_data(file_content: bytes, file_name: str) -> dict[str, Any]:
     
     This is the main tool function called by the Unit Filling Agent.
     """
-    return process_file_with_gemini(
+    return _extract_with_cache(
         file_content=file_content,
         file_name=file_name,
-        extraction_prompt=UNIT_EXTRACTION_PROMPT
+        extraction_prompt=UNIT_EXTRACTION_PROMPT,
+        prompt_version=UNIT_PROMPT_VERSION,
+        response_schema=UnitExtraction,
+        required_keys=("staff", "shiftCodes")
+    )
+
+
+async def _run_extraction(
+    state: _LoopState,
+    key: tuple,
+    extract: Callable[[bytes, str], dict[str, Any]],
+    file_content: bytes,
+    file_name: str
+) -> dict[str, Any]:
+    try:
+        async with state.semaphore:
+            return await asyncio.to_thread(extract, file_content, file_name)
+    finally:
+        # Runs on success, error and cancellation alike
+        if state.inflight.get(key) is asyncio.current_task():
+            del state.inflight[key]
+
+
+async def extract_async(
+    extract: Callable[[bytes, str], dict[str, Any]],
+    file_content: bytes,
+    file_name: str
+) -> dict[str, Any]:
+    """
+    Run a blocking extract_* function off the event loop.
+    
+    Calls are bounded by GEMINI_CONCURRENCY (per event loop) so concurrent
+    uploads overlap their Gemini round-trips without exceeding the rate
+    limit. Concurrent calls for the same file share one in-flight
+    extraction (single-flight), covering the window before the content
+    cache is filled.
+    """
+    state = _loop_state()
+    key = (extract, _get_mime_type(file_name), hashlib.sha256(file_content).digest())
+    task = state.inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _run_extraction(state, key, extract, file_content, file_name)
+        )
+        state.inflight[key] = task
+    # Shield so one caller being cancelled doesn't cancel the others
+    return await asyncio.shield(task)
+
+
+async def extract_rota_and_unit_data(file_content: bytes, file_name: str) -> dict[str, Any]:
+    """
+    Extract both rota and unit data from one upload concurrently.
+    
+    For workbooks that hold both the staff list and the rota, the two Gemini
+    calls overlap, so this takes about as long as a single extraction.
+    """
+    rota, unit = await asyncio.gather(
+        extract_async(extract_rota_data, file_content, file_name),
+        extract_async(extract_unit_data, file_content, file_name)
     )
+    return {"rota": rota, "unit": unit}
@@ -7,9 +7,10 @@ This agent helps users fill the Create Rota form by:
 3. Providing suggestions for form fields
 """
 
-from typing import Any
+from itertools import islice
+from typing import Any, ClassVar, Final, Iterator
 
-from .file_processor import extract_rota_data
+from .file_processor import extract_rota_data, extract_async
 
 
 # =============================================================================
@@ -47,47 +48,84 @@ def suggest_date_range(extracted_data: dict[str, Any]) -> dict[str, str]:
     }
 
 
-def format_special_requests(extracted_data: dict[str, Any]) -> list[dict[str, Any]]:
+def iter_special_requests(
+    extracted_data: dict[str, Any],
+    limit: int | None = None
+) -> Iterator[dict[str, Any]]:
     """
-    Format extracted special requests for the rota form.
+    Yield extracted special requests in the format expected by the frontend.
     
     Args:
         extracted_data: Data extracted from the file
+        limit: Optional maximum number of requests to yield
         
-    Returns:
-        List of special requests in the format expected by the frontend
+    Yields:
+        One special request dict at a time
     """
-    requests = []
-    for req in extracted_data.get("specialRequests", []):
-        requests.append({
+    for req in islice(extracted_data.get("specialRequests") or (), limit):
+        yield {
             "staffName": req.get("staffName"),
             "date": req.get("date"),
-            "shiftCode": _map_request_to_shift_code(req.get("requestType", "")),
+            "shiftCode": _map_request_to_shift_code(req.get("requestType") or ""),
             "isLocked": True,  # Pre-filled requests should be locked
             "notes": req.get("notes", "")
-        })
-    return requests
+        }
+
+
+def format_special_requests(
+    extracted_data: dict[str, Any],
+    limit: int | None = None
+) -> list[dict[str, Any]]:
+    """
+    Format extracted special requests for the rota form.
+    
+    Args:
+        extracted_data: Data extracted from the file
+        limit: Optional maximum number of requests to format
+        
+    Returns:
+        List of special requests in the format expected by the frontend
+    """
+    return list(iter_special_requests(extracted_data, limit))
+
+
+_REQUEST_TO_SHIFT_CODE: dict[str, str] = {
+    "leave": "AL",
+    "annual leave": "AL",
+    "sick": "SL",
+    "sick leave": "SL",
+    "training": "TR",
+    "study": "SD",
+    "day off": "DO",
+    "off": "O",
+}
 
 
 def _map_request_to_shift_code(request_type: str) -> str:
     """Map request types to standard shift codes."""
-    mappings = {
-        "leave": "AL",
-        "annual leave": "AL",
-        "sick": "SL",
-        "sick leave": "SL",
-        "training": "TR",
-        "study": "SD",
-        "day off": "DO",
-        "off": "O",
-    }
-    return mappings.get(request_type.lower(), "O")
+    return _REQUEST_TO_SHIFT_CODE.get(request_type.casefold(), "O")
 
 
 # =============================================================================
 # Agent Definition
 # =============================================================================
 
+_ROTA_SYSTEM_INSTRUCTION: Final[str] = """You are a helpful assistant that helps users fill out duty rota (schedule) forms.
+
+Your capabilities:
+1. Process uploaded files (Excel, Word, PDF) containing schedule or rota data
+2. Extract key information like date ranges, staff assignments, and leave requests
+3. Suggest how to fill in form fields based on extracted data
+4. Answer questions about the scheduling process
+
+When a user uploads a file:
+1. Analyze the file to extract schedule information
+2. Summarize what you found (date range, number of staff, special requests)
+3. Offer to help fill in specific form fields
+
+Be concise and helpful. Focus on extracting accurate data from files."""
+
+
 class RotaFillingAgent:
     """
     Agent for filling rota forms using Vertex AI Gemini.
@@ -99,33 +137,21 @@ class RotaFillingAgent:
     - Help users complete the pre-schedule grid
     """
     
+    __slots__ = ("name", "model", "_extracted_data")
+    
+    system_instruction: ClassVar[str] = _ROTA_SYSTEM_INSTRUCTION
+    
     def __init__(self):
         self.name = "rota_filling_agent"
         self.model = "gemini-2.0-flash"
         self._extracted_data: dict[str, Any] | None = None
     
-    @property
-    def system_instruction(self) -> str:
-        return """You are a helpful assistant that helps users fill out duty rota (schedule) forms.
-
-Your capabilities:
-1. Process uploaded files (Excel, Word, PDF) containing schedule or rota data
-2. Extract key information like date ranges, staff assignments, and leave requests
-3. Suggest how to fill in form fields based on extracted data
-4. Answer questions about the scheduling process
-
-When a user uploads a file:
-1. Analyze the file to extract schedule information
-2. Summarize what you found (date range, number of staff, special requests)
-3. Offer to help fill in specific form fields
-
-Be concise and helpful. Focus on extracting accurate data from files."""
-    
     async def process_file_and_respond(
         self,
         file_content: bytes,
         file_name: str,
-        user_message: str = ""
+        user_message: str = "",
+        limit: int | None = None
     ) -> dict[str, Any]:
         """
         Process an uploaded file and generate a response.
@@ -134,17 +160,19 @@ Be concise and helpful. Focus on extracting accurate data from files."""
             file_content: Raw bytes of the uploaded file
             file_name: Original filename
             user_message: Optional user message/question
+            limit: Optional maximum number of special requests to format
+                into suggestions (stats still count everything found)
             
         Returns:
             Dict containing extracted data and agent response
         """
         # Extract data from file
-        self._extracted_data = extract_rota_data(file_content, file_name)
+        self._extracted_data = await extract_async(extract_rota_data, file_content, file_name)
         
         # Generate summary response
         summary = self._extracted_data.get("summary", "File processed")
-        staff_count = len(self._extracted_data.get("staffAssignments", []))
-        requests_count = len(self._extracted_data.get("specialRequests", []))
+        staff_count = len(self._extracted_data.get("staffAssignments") or ())
+        requests_count = len(self._extracted_data.get("specialRequests") or ())
         
         response = {
             "extracted_data": self._extracted_data,
@@ -157,7 +185,7 @@ Be concise and helpful. Focus on extracting accurate data from files."""
             },
             "suggestions": {
                 "date_range": suggest_date_range(self._extracted_data),
-                "special_requests": format_special_requests(self._extracted_data)
+                "special_requests": format_special_requests(self._extracted_data, limit)
             }
         }
         
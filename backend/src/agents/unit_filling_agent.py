@@ -8,9 +8,11 @@ This agent helps users fill the Create Unit form by:
 4. Providing suggestions for form fields
 """
 
-from typing import Any
+import re
+from functools import lru_cache
+from typing import Any, ClassVar, Final
 
-from .file_processor import extract_unit_data
+from .file_processor import extract_unit_data, extract_async
 
 
 # =============================================================================
@@ -35,22 +37,23 @@ def format_staff_list(extracted_data: dict[str, Any]) -> list[dict[str, Any]]:
     """
     Format extracted staff data for the unit form.
     
+    The staff dicts are canonicalized in place (defaults filled in, position
+    and type normalized), so extracted_data["staff"] is the returned list.
+    
     Args:
         extracted_data: Data extracted from the file
         
     Returns:
         List of staff members in the format expected by the frontend
     """
-    staff_list = []
-    for staff in extracted_data.get("staff", []):
-        staff_list.append({
-            "name": staff.get("name", ""),
-            "staffId": staff.get("staffId", ""),
-            "position": _normalize_position(staff.get("position", "Level 1")),
-            "type": _normalize_staff_type(staff.get("type", "Direct Care")),
-            "contractedHours": staff.get("contractedHours") or 160,
-            "comments": staff.get("comments", "")
-        })
+    staff_list = extracted_data.get("staff") or []
+    for staff in staff_list:
+        staff.setdefault("name", "")
+        staff.setdefault("staffId", "")
+        staff["position"] = _normalize_position(staff.get("position") or "Level 1")
+        staff["type"] = _normalize_staff_type(staff.get("type") or "Direct Care")
+        staff["contractedHours"] = staff.get("contractedHours") or 160
+        staff.setdefault("comments", "")
     return staff_list
 
 
@@ -58,39 +61,46 @@ def format_shift_codes(extracted_data: dict[str, Any]) -> list[dict[str, Any]]:
     """
     Format extracted shift codes for the unit form.
     
+    Like format_staff_list, the shift code dicts are canonicalized in place.
+    
     Args:
         extracted_data: Data extracted from the file
         
     Returns:
         List of shift codes in the format expected by the frontend
     """
-    shift_codes = []
-    for code in extracted_data.get("shiftCodes", []):
-        shift_codes.append({
-            "code": code.get("code", "").upper(),
-            "definition": code.get("definition", ""),
-            "description": code.get("description", ""),
-            "hours": code.get("hours") or 8,
-            "type": _normalize_staff_type(code.get("type", "Direct Care")),
-            "remarks": code.get("remarks", "")
-        })
+    shift_codes = extracted_data.get("shiftCodes") or []
+    for code in shift_codes:
+        code["code"] = (code.get("code") or "").upper()
+        code.setdefault("definition", "")
+        code.setdefault("description", "")
+        code["hours"] = code.get("hours") or 8
+        code["type"] = _normalize_staff_type(code.get("type") or "Direct Care")
+        code.setdefault("remarks", "")
     return shift_codes
 
 
+_is_senior = re.compile(r"3|senior", re.IGNORECASE).search
+_is_mid = re.compile(r"2|mid", re.IGNORECASE).search
+_is_non_direct = re.compile(r"non|indirect", re.IGNORECASE).search
+
+
+# Extracted files repeat a handful of position/type strings across rows
+@lru_cache(maxsize=256)
 def _normalize_position(position: str) -> str:
     """Normalize position to match frontend options."""
-    position_lower = position.lower()
-    if "3" in position_lower or "senior" in position_lower:
+    if _is_senior(position):
         return "Level 3"
-    elif "2" in position_lower or "mid" in position_lower:
+    elif _is_mid(position):
         return "Level 2"
     else:
         return "Level 1"
 
 
+@lru_cache(maxsize=256)
 def _normalize_staff_type(staff_type: str) -> str:
     """Normalize staff type to match frontend options."""
-    if "non" in staff_type.lower() or "indirect" in staff_type.lower():
+    if _is_non_direct(staff_type):
         return "Non-Direct Care"
     return "Direct Care"
 
@@ -99,25 +109,7 @@ def _normalize_staff_type(staff_type: str) -> str:
 # Agent Definition
 # =============================================================================
 
-class UnitFillingAgent:
-    """
-    Agent for filling unit configuration forms using Vertex AI Gemini.
-    
-    This agent can:
-    - Process uploaded staff lists (Excel, Word, PDF)
-    - Extract staff information (names, IDs, positions, hours)
-    - Extract shift code definitions from policy documents
-    - Help users complete the unit configuration form
-    """
-    
-    def __init__(self):
-        self.name = "unit_filling_agent"
-        self.model = "gemini-2.0-flash"
-        self._extracted_data: dict[str, Any] | None = None
-    
-    @property
-    def system_instruction(self) -> str:
-        return """You are a helpful assistant that helps users fill out unit configuration forms for staff scheduling.
+_UNIT_SYSTEM_INSTRUCTION: Final[str] = """You are a helpful assistant that helps users fill out unit configuration forms for staff scheduling.
 
 Your capabilities:
 1. Process uploaded files (Excel, Word, PDF) containing staff lists or shift definitions
@@ -134,6 +126,27 @@ Staff positions should be: Level 1, Level 2, or Level 3
 Staff types should be: Direct Care or Non-Direct Care
 
 Be concise and helpful. Focus on extracting accurate data from files."""
+
+
+class UnitFillingAgent:
+    """
+    Agent for filling unit configuration forms using Vertex AI Gemini.
+    
+    This agent can:
+    - Process uploaded staff lists (Excel, Word, PDF)
+    - Extract staff information (names, IDs, positions, hours)
+    - Extract shift code definitions from policy documents
+    - Help users complete the unit configuration form
+    """
+    
+    __slots__ = ("name", "model", "_extracted_data")
+    
+    system_instruction: ClassVar[str] = _UNIT_SYSTEM_INSTRUCTION
+    
+    def __init__(self):
+        self.name = "unit_filling_agent"
+        self.model = "gemini-2.0-flash"
+        self._extracted_data: dict[str, Any] | None = None
     
     async def process_file_and_respond(
         self,
@@ -153,7 +166,7 @@ Be concise and helpful. Focus on extracting accurate data from files."""
             Dict containing extracted data and agent response
         """
         # Extract data from file
-        self._extracted_data = extract_unit_data(file_content, file_name)
+        self._extracted_data = await extract_async(extract_unit_data, file_content, file_name)
         
         # Generate summary response
         summary = self._extracted_data.get("summary", "File processed")
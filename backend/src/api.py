@@ -3,25 +3,80 @@ FastAPI endpoint for Nurse Scheduling API
 
 Exposes the 3-agent CrewAI pipeline to the frontend.
 """
+import asyncio
+import logging
+import logging.handlers
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+import os
 import uvicorn
+from dotenv import load_dotenv
+
+# Load backend/.env before any os.getenv below (ENABLE_TIMEFOLD, SCHEDULING_WORKERS, LOG_LEVEL)
+load_dotenv()
+
+# CrewAI scheduling with Timefold (requires Java 17+). Set ENABLE_TIMEFOLD=0
+# to serve the API without importing the crew/solver stack.
+ENABLE_TIMEFOLD = os.getenv("ENABLE_TIMEFOLD", "1") == "1"
+if ENABLE_TIMEFOLD:
+    from src.crew import run_scheduling_crew
+
+# Solves run on worker threads so the event loop keeps serving other requests.
+# Threads rather than processes: Timefold runs in the in-process JVM (JPype),
+# which does its work outside the GIL, and each process would start its own JVM.
+# The pool is created per app lifespan (see lifespan below).
+SCHEDULING_WORKERS = int(os.getenv("SCHEDULING_WORKERS", "2"))
+
+# Request threads only enqueue log records; a listener thread formats and
+# writes them, so concurrent solves don't contend on stderr.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    # Guarded so repeated lifespans (tests, reloads) don't stack handlers
+    if _log_queue_handler not in root.handlers:
+        root.addHandler(_log_queue_handler)
+    _log_listener.start()
+    app.state.scheduling_pool = ThreadPoolExecutor(
+        max_workers=SCHEDULING_WORKERS,
+        thread_name_prefix="scheduling"
+    )
+    try:
+        yield
+    finally:
+        app.state.scheduling_pool.shutdown(wait=True, cancel_futures=True)
+        _log_listener.stop()
+        root.removeHandler(_log_queue_handler)
 
-# CrewAI scheduling with Timefold (requires Java 17+)
-from src.crew import run_scheduling_crew
 
 app = FastAPI(
     title="Nurse Scheduling API",
     description="AI-powered nurse scheduling using CrewAI + Timefold",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# CORS for frontend
+# CORS for frontend (local dev servers)
+_CORS_ORIGIN_REGEX = r"^http://localhost:(3000|4000|5173|5175)$"
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:4000", "http://localhost:5173", "http://localhost:5175"],
+    allow_origin_regex=_CORS_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -60,6 +115,30 @@ class ScheduleRequest(BaseModel):
     time_limit_seconds: int = 30
 
 
+_DISABLED_RESPONSE = ScheduleResponse(
+    status="disabled",
+    error="Scheduling is disabled",
+    details="Set ENABLE_TIMEFOLD=1 to enable the CrewAI + Timefold pipeline"
+).model_dump(mode="json")
+
+
+def _schedule_response(result: dict) -> JSONResponse:
+    """
+    Validate a crew result once and return it as the response.
+    
+    Returning the model itself would make FastAPI dump and re-validate the
+    whole schedule list against response_model a second time.
+    """
+    response = ScheduleResponse.model_validate(result)
+    return JSONResponse(content=response.model_dump(mode="json"))
+
+
+async def _run_crew(rota_id: str) -> dict:
+    """Run the blocking crew pipeline on the scheduling pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.scheduling_pool, run_scheduling_crew, rota_id)
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
@@ -79,7 +158,11 @@ async def root():
 
 @app.get("/api/health")
 async def health():
-    return {"status": "healthy", "scheduling": "enabled", "solver": "timefold"}
+    return {
+        "status": "healthy",
+        "scheduling": "enabled" if ENABLE_TIMEFOLD else "disabled",
+        "solver": "timefold"
+    }
 
 
 @app.post("/api/schedule/{rota_id}", response_model=ScheduleResponse)
@@ -89,9 +172,11 @@ async def generate_schedule(rota_id: str):
     
     Uses CrewAI agents with Timefold solver for constraint optimization.
     """
+    if not ENABLE_TIMEFOLD:
+        return JSONResponse(content=_DISABLED_RESPONSE)
     try:
-        result = run_scheduling_crew(rota_id)
-        return ScheduleResponse(**result)
+        result = await _run_crew(rota_id)
+        return _schedule_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -101,9 +186,11 @@ async def generate_schedule_body(request: ScheduleRequest):
     """
     Alternative endpoint accepting rota_id in request body.
     """
+    if not ENABLE_TIMEFOLD:
+        return JSONResponse(content=_DISABLED_RESPONSE)
     try:
-        result = run_scheduling_crew(request.rota_id)
-        return ScheduleResponse(**result)
+        result = await _run_crew(request.rota_id)
+        return _schedule_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
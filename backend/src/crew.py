@@ -13,34 +13,48 @@ Pipeline:
 3. Agent 2: Run solver → Validate locked requests → Format non-clinical codes
 """
 import os
-import json
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task, before_kickoff, after_kickoff
-from supabase import create_client
+from supabase import Client, create_client
+import orjson
 from dotenv import load_dotenv
 
 from src.tools.scheduling_tools import TimefoldSolverTool
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ==========================================================================
 # LANGFUSE TRACING
 # ==========================================================================
-try:
-    from langfuse import get_client
-    from openinference.instrumentation.crewai import CrewAIInstrumentor
-    
-    langfuse = get_client()
-    if langfuse.auth_check():
-        print("✅ Langfuse tracing enabled")
-        CrewAIInstrumentor().instrument(skip_dep_check=True)
-    else:
-        print("⚠️ Langfuse auth failed - tracing disabled")
-except ImportError:
-    print("⚠️ Langfuse not installed")
+# auth_check() is an HTTPS round-trip at import time, so only pay for it when
+# tracing is wanted (default: on when Langfuse keys are configured)
+LANGFUSE_ENABLED = os.getenv(
+    "LANGFUSE_ENABLED", "1" if os.getenv("LANGFUSE_PUBLIC_KEY") else "0"
+) == "1"
+
+if LANGFUSE_ENABLED:
+    try:
+        from langfuse import get_client
+        from openinference.instrumentation.crewai import CrewAIInstrumentor
+        
+        langfuse = get_client()
+        if langfuse.auth_check():
+            logger.info("✅ Langfuse tracing enabled")
+            CrewAIInstrumentor().instrument(skip_dep_check=True)
+        else:
+            logger.warning("⚠️ Langfuse auth failed - tracing disabled")
+    except ImportError:
+        logger.info("⚠️ Langfuse not installed")
 
 # ==========================================================================
 # PATHS
@@ -49,6 +63,77 @@ SCHEDULING_PATH = Path(__file__).parent / "scheduling"
 INPUT_DATA_FILE = SCHEDULING_PATH / "input_data.json"
 
 
+# ==========================================================================
+# SHARED CLIENTS
+# ==========================================================================
+@lru_cache(maxsize=1)
+def get_supabase_client() -> Client:
+    """Supabase client shared by all crew instances."""
+    return create_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_KEY")
+    )
+
+
+@lru_cache(maxsize=1)
+def get_llm() -> LLM:
+    """Vertex AI LLM shared by all crew instances."""
+    return LLM(
+        model="vertex_ai/gemini-2.5-flash",
+        project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+        location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1"),
+        timeout=360,
+    )
+
+
+def _validate_rota_id(rota_id: str) -> None:
+    """Reject malformed ids before spending a Supabase round-trip on them."""
+    try:
+        uuid.UUID(rota_id)
+    except (ValueError, AttributeError, TypeError):
+        raise ValueError(f"Invalid rota_id (expected a UUID): {rota_id!r}") from None
+
+
+# ==========================================================================
+# ROTA DATA
+# ==========================================================================
+# Only the columns the agents read (no timestamps or unit metadata)
+ROTA_COLUMNS = (
+    "id, unit_id, unit_name, start_date, end_date, staff_owing_hours, "
+    "staff_target_hours, special_requests, comments, "
+    "units(id, name, min_nurses_per_shift, rules, staff, shift_codes)"
+)
+
+
+def _load_rota_bundle(supabase: Client, rota_id: str) -> Dict[str, str]:
+    """
+    Fetch a rota and its unit, serialized as the agents' inputs.
+    
+    Returns:
+        rota_data, unit_data and special_requests as JSON strings
+    """
+    # 1. Fetch Rota Config with its Unit embedded (one round-trip via the
+    #    rotas_config.unit_id foreign key)
+    rota_res = supabase.table("rotas_config").select(ROTA_COLUMNS).eq("id", rota_id).single().execute()
+    if not rota_res.data:
+        raise ValueError(f"Rota not found: {rota_id}")
+    
+    # 2. Split out the Unit Data
+    rota_data = rota_res.data
+    unit_data = rota_data.pop("units", None)
+    if not unit_data:
+        raise ValueError(f"Unit not found: {rota_data['unit_id']}")
+    
+    logger.info("✅ Fetched: %d staff members", len(unit_data.get('staff', [])))
+    
+    return {
+        'rota_data': orjson.dumps(rota_data, default=str).decode(),
+        'unit_data': orjson.dumps(unit_data, default=str).decode(),
+        # Agent 2 needs special_requests for validation
+        'special_requests': orjson.dumps(rota_data.get("special_requests", []), default=str).decode(),
+    }
+
+
 @CrewBase
 class NurseSchedulingCrew:
     """
@@ -61,19 +146,17 @@ class NurseSchedulingCrew:
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
 
-    def __init__(self):
-        # Initialize Supabase client
-        self.supabase = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_KEY")
-        )
-        # Initialize LLM
-        self.llm = LLM(
-            model="vertex_ai/gemini-2.5-flash",
-            project=os.getenv("GOOGLE_CLOUD_PROJECT"),
-            location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1"),
-            timeout=360,
-        )
+    def __init__(self, input_file_path: Optional[str] = None,
+                 rota_bundle: Optional[Dict[str, str]] = None):
+        # Where Agent 1 writes the solver input and Agent 2's tool reads it;
+        # concurrent runs each pass their own path
+        self.input_file_path = input_file_path or str(INPUT_DATA_FILE)
+        # Prefetched _load_rota_bundle() result for the rota this crew is
+        # kicked off with, so retry kickoffs don't fetch again
+        self.rota_bundle = rota_bundle
+        # Shared across kickoffs so repeated runs reuse connections
+        self.supabase = get_supabase_client()
+        self.llm = get_llm()
 
     @before_kickoff
     def fetch_rota_data(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
@@ -84,39 +167,25 @@ class NurseSchedulingCrew:
         rota_id = inputs.get('rota_id')
         if not rota_id:
             raise ValueError("rota_id is required in inputs")
+        _validate_rota_id(rota_id)
 
-        print(f"\n📡 [Before Kickoff] Fetching data for Rota ID: {rota_id}")
+        logger.info("📡 [Before Kickoff] Fetching data for Rota ID: %s", rota_id)
 
-        # 1. Fetch Rota Config
-        rota_res = self.supabase.table("rotas_config").select("*").eq("id", rota_id).single().execute()
-        if not rota_res.data:
-            raise ValueError(f"Rota not found: {rota_id}")
-        
-        # 2. Fetch Unit Data
-        unit_id = rota_res.data["unit_id"]
-        unit_res = self.supabase.table("units").select("*").eq("id", unit_id).single().execute()
-        if not unit_res.data:
-            raise ValueError(f"Unit not found: {unit_id}")
-        
-        print(f"✅ Fetched: {len(unit_res.data.get('staff', []))} staff members")
-        
-        # 3. Structure data for the Agents (inject into inputs dict)
-        inputs['rota_data'] = json.dumps(rota_res.data, default=str)
-        inputs['unit_data'] = json.dumps(unit_res.data, default=str)
-        # Agent 2 needs special_requests for validation
-        inputs['special_requests'] = json.dumps(rota_res.data.get("special_requests", []), default=str)
+        # Structure data for the Agents (inject into inputs dict)
+        bundle = self.rota_bundle
+        if bundle is None:
+            bundle = _load_rota_bundle(self.supabase, rota_id)
+        inputs.update(bundle)
 
         # Pass file path so agents know where to save/read
-        inputs['input_file_path'] = str(INPUT_DATA_FILE)
+        inputs['input_file_path'] = self.input_file_path
         
         return inputs
 
     @after_kickoff
     def log_completion(self, result):
         """Log completion after crew finishes."""
-        print(f"\n{'='*70}")
-        print("✅ CREW COMPLETE")
-        print(f"{'='*70}")
+        logger.info("✅ CREW COMPLETE")
         return result
 
     @agent
@@ -145,7 +214,7 @@ class NurseSchedulingCrew:
         """Task 1: Generate input_data.json from Supabase data."""
         return Task(
             config=self.tasks_config['generate_input_task'],
-            output_file=str(INPUT_DATA_FILE)
+            output_file=self.input_file_path
         )
 
     @task
@@ -170,6 +239,17 @@ class NurseSchedulingCrew:
 # ENTRY POINT (for backwards compatibility with api.py)
 # ==========================================================================
 
+def _strip_code_fence(text: str) -> str:
+    """Return the body of a ```json (or bare ```) fence, or text unchanged."""
+    for fence in ("```json", "```"):
+        start = text.find(fence)
+        if start >= 0:
+            start += len(fence)
+            end = text.find("```", start)
+            return text[start:end] if end >= 0 else text[start:]
+    return text
+
+
 def run_scheduling_crew(rota_id: str) -> dict:
     """
     Run the nurse scheduling crew.
@@ -182,63 +262,133 @@ def run_scheduling_crew(rota_id: str) -> dict:
     Returns:
         Schedule JSON for frontend
     """
-    print(f"\n{'='*70}")
-    print("🏥 NURSE SCHEDULING CREW (Class-Based)")
-    print(f"{'='*70}")
-    print(f"Rota ID: {rota_id}")
-    print(f"Output: {INPUT_DATA_FILE}")
+    logger.info("🏥 NURSE SCHEDULING CREW (Class-Based) - Rota ID: %s", rota_id)
+    
+    try:
+        _validate_rota_id(rota_id)
+    except ValueError as e:
+        logger.warning("⚠️ %s", e)
+        return {"status": "error", "error": str(e)}
+    
+    # Per-run input file so concurrent runs don't overwrite one another
+    input_file = SCHEDULING_PATH / f"input_data_{uuid.uuid4().hex}.json"
+    logger.info("Output: %s", input_file)
     
-    max_attempts = 2
+    # Fetch the rota and build agents/tasks/tools once; retries only kick off again
+    try:
+        rota_bundle = _load_rota_bundle(get_supabase_client(), rota_id)
+        scheduling_crew = NurseSchedulingCrew(
+            input_file_path=str(input_file),
+            rota_bundle=rota_bundle
+        ).crew()
+    except Exception as e:
+        logger.exception("❌ Error: %s", e)
+        return {"status": "error", "error": f"Scheduling failed: {str(e)}"}
     
+    try:
+        return _kickoff_with_retries(scheduling_crew, rota_id)
+    finally:
+        input_file.unlink(missing_ok=True)
+
+
+def _kickoff_with_retries(scheduling_crew: Crew, rota_id: str, max_attempts: int = 2) -> dict:
+    """Kick off the crew, retrying once if the schedule has validation issues."""
     for attempt in range(1, max_attempts + 1):
-        print(f"\n🔄 Attempt {attempt}/{max_attempts}")
+        logger.info("🔄 Attempt %d/%d", attempt, max_attempts)
         
         try:
-            # Create crew and run with rota_id input
+            # Run crew with rota_id input
             inputs = {'rota_id': rota_id}
-            result = NurseSchedulingCrew().crew().kickoff(inputs=inputs)
+            result = scheduling_crew.kickoff(inputs=inputs)
             
-            # Parse result
-            result_str = str(result)
+            # Parse result, cleaning up markdown if present
+            result_str = _strip_code_fence(str(result))
             
-            # Clean up markdown if present
-            if "```json" in result_str:
-                result_str = result_str.split("```json")[1].split("```")[0]
-            elif "```" in result_str:
-                result_str = result_str.split("```")[1].split("```")[0]
-            
-            parsed_result = json.loads(result_str.strip())
+            parsed_result = orjson.loads(result_str.strip())
             
             # Check for validation issues
             validation_issues = parsed_result.get("summary", {}).get("validationIssues", [])
             
             if not validation_issues:
-                print(f"\n✅ SCHEDULE COMPLETE - All validations passed")
+                logger.info("✅ SCHEDULE COMPLETE - All validations passed")
                 return parsed_result
             else:
-                print(f"⚠️ Validation issues: {validation_issues}")
+                logger.warning("⚠️ Validation issues: %s", validation_issues)
                 if attempt < max_attempts:
-                    print("Retrying...")
+                    logger.info("Retrying...")
                     continue
                 else:
                     return parsed_result
                     
-        except json.JSONDecodeError as e:
-            print(f"⚠️ JSON parse error: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.warning("⚠️ JSON parse error: %s", e)
             # Return raw result if can't parse
             return {"status": "error", "error": f"JSON parse error: {e}", "raw": str(result)}
             
         except Exception as e:
-            print(f"❌ Error: {e}")
+            logger.exception("❌ Error: %s", e)
             if attempt >= max_attempts:
                 return {"status": "error", "error": f"Scheduling failed: {str(e)}"}
     
     return {"status": "error", "error": f"Failed after {max_attempts} attempts"}
 
 
+def run_many(rota_ids: List[str], max_workers: int = 8) -> List[dict]:
+    """
+    Run the scheduling crew for several rotas concurrently.
+    
+    Runs share the cached Supabase client and LLM; LLM calls and solves
+    overlap across rotas instead of running back to back.
+    
+    Args:
+        rota_ids: Rota configuration IDs
+        max_workers: Maximum number of concurrent runs
+        
+    Returns:
+        One schedule result per rota_id, in the same order
+    """
+    if not rota_ids:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(rota_ids))) as executor:
+        return list(executor.map(run_scheduling_crew, rota_ids))
+
+
+async def run_scheduling_crew_async(rota_id: str) -> dict:
+    """
+    Async wrapper around run_scheduling_crew.
+    
+    Crew.kickoff_async only runs kickoff in a worker thread, so this does
+    the same for the whole run, keeping validation, retries and input file
+    cleanup in one place.
+    """
+    return await asyncio.to_thread(run_scheduling_crew, rota_id)
+
+
+async def run_many_async(rota_ids: List[str], concurrency: int = 5) -> List[dict]:
+    """
+    Async counterpart of run_many, with at most `concurrency` runs in flight.
+    
+    Args:
+        rota_ids: Rota configuration IDs
+        concurrency: Maximum number of concurrent runs (bounds LLM traffic)
+        
+    Returns:
+        One schedule result per rota_id, in the same order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_one(rota_id: str) -> dict:
+        async with semaphore:
+            return await run_scheduling_crew_async(rota_id)
+    
+    return await asyncio.gather(*(run_one(rota_id) for rota_id in rota_ids))
+
+
 if __name__ == "__main__":
     import argparse
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     parser = argparse.ArgumentParser(description="Run Nurse Scheduling Crew")
     parser.add_argument("--rota-id", required=True, help="Rota configuration ID")
     parser.add_argument("--output", help="Output file path")
@@ -246,12 +396,12 @@ if __name__ == "__main__":
     
     result = run_scheduling_crew(args.rota_id)
     
-    output_str = json.dumps(result, indent=2)
+    output = orjson.dumps(result, default=str, option=orjson.OPT_INDENT_2)
     
     if args.output:
-        with open(args.output, "w") as f:
-            f.write(output_str)
+        with open(args.output, "wb") as f:
+            f.write(output)
         print(f"Saved to: {args.output}")
     else:
         print("\n--- SCHEDULE OUTPUT ---")
-        print(output_str)
+        print(output.decode())
@@ -6,8 +6,11 @@ Usage:
     python -m src.main --rota-id <rota-uuid> --output schedule.json
 """
 import argparse
-import json
+import logging
 import sys
+
+import orjson
+
 from src.crew import NurseSchedulingCrew, run_scheduling_crew
 
 
@@ -18,27 +21,29 @@ def main():
     parser.add_argument("--direct", action="store_true", help="Use direct crew kickoff instead of wrapper")
     args = parser.parse_args()
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     try:
         if args.direct:
             # Use the class-based crew directly
             print("Using direct crew kickoff...")
             inputs = {'rota_id': args.rota_id}
             result = NurseSchedulingCrew().crew().kickoff(inputs=inputs)
-            output = str(result)
+            output = str(result).encode()
         else:
             # Use the wrapper function (with retry logic)
             result = run_scheduling_crew(args.rota_id)
-            output = json.dumps(result, indent=2)
+            output = orjson.dumps(result, default=str, option=orjson.OPT_INDENT_2)
         
         if args.output:
-            with open(args.output, "w") as f:
+            with open(args.output, "wb") as f:
                 f.write(output)
             print(f"\n✅ Saved to: {args.output}")
         else:
             print("\n" + "="*70)
             print("SCHEDULE OUTPUT")
             print("="*70)
-            print(output)
+            print(output.decode())
             
     except Exception as e:
         print(f"\n❌ Error: {e}")
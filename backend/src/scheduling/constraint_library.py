@@ -4,8 +4,7 @@ Constraint Library for Nurse Scheduling
 All possible constraints are defined here as functions.
 The constraint_config in input_data.json determines which ones are used.
 """
-from datetime import timedelta
-from typing import List, Callable
+from typing import List
 
 from timefold.solver.score import (
     constraint_provider,
@@ -18,6 +17,25 @@ from timefold.solver.score import (
 from .domain import Shift, Employee, ShiftSchedule
 
 
+def _employee_id(shift: Shift):
+    """Join key for same-employee joins: a plain string instead of Employee.__eq__."""
+    return shift.employee.id if shift.employee is not None else None
+
+
+def _is_assigned(shift: Shift) -> bool:
+    return shift.employee is not None
+
+
+def _assigned(factory: ConstraintFactory):
+    """
+    Assigned shifts, the common starting stream of most constraints.
+    
+    Using one predicate object lets Timefold share the filter node across
+    constraints instead of evaluating an equivalent lambda per constraint.
+    """
+    return factory.for_each(Shift).filter(_is_assigned)
+
+
 # =============================================================================
 # HARD CONSTRAINTS
 # =============================================================================
@@ -25,12 +43,12 @@ from .domain import Shift, Employee, ShiftSchedule
 def one_shift_per_day(factory: ConstraintFactory, **kwargs):
     """An employee can only work one shift per day."""
     return (
-        factory.for_each(Shift)
-        .filter(lambda s: s.employee is not None)
+        _assigned(factory)
         .join(Shift,
-              Joiners.equal(lambda s: s.employee),
-              Joiners.equal(lambda s: s.start.date()),
-              Joiners.less_than(lambda s: s.id))
+              Joiners.equal(_employee_id),
+              Joiners.equal(lambda s: s._date_ord),
+              # Each unordered pair once; ShiftSchedule numbers _slot uniquely on construction
+              Joiners.less_than(lambda s: s._slot))
         .penalize(HardSoftScore.ONE_HARD)
         .as_constraint("One shift per day")
     )
@@ -38,15 +56,15 @@ def one_shift_per_day(factory: ConstraintFactory, **kwargs):
 
 def no_night_then_morning(factory: ConstraintFactory, rest_hours: int = 10, **kwargs):
     """Must have minimum rest hours between shifts."""
+    rest_seconds = rest_hours * 3600
     return (
-        factory.for_each(Shift)
-        .filter(lambda s: s.employee is not None and s.is_night_shift())
-        .join(Shift,
-              Joiners.equal(lambda s: s.employee),
-              Joiners.less_than(lambda s: s.end, lambda s: s.start))
-        .filter(lambda s1, s2: 
-                s2.is_morning_shift() and 
-                (s2.start - s1.end).total_seconds() / 3600 < rest_hours)
+        _assigned(factory)
+        .filter(lambda s: s._is_night)
+        .join(_assigned(factory).filter(lambda s: s._is_morning),
+              Joiners.equal(_employee_id),
+              # Index the rest window so only shifts starting within it are joined
+              Joiners.less_than(lambda s: s._end_epoch, lambda s: s._start_epoch),
+              Joiners.greater_than(lambda s: s._end_epoch + rest_seconds, lambda s: s._start_epoch))
         .penalize(HardSoftScore.ONE_HARD)
         .as_constraint("No night then morning")
     )
@@ -55,10 +73,8 @@ def no_night_then_morning(factory: ConstraintFactory, rest_hours: int = 10, **kw
 def honor_unavailability(factory: ConstraintFactory, **kwargs):
     """Employee must not be assigned during unavailable times."""
     return (
-        factory.for_each(Shift)
-        .filter(lambda s: 
-                s.employee is not None and 
-                s.employee.is_unavailable(s.start, s.end))
+        _assigned(factory)
+        .filter(lambda s: ((s.employee._unavailable_mask >> s._slot) & 1) == 1)
         .penalize(HardSoftScore.ONE_HARD)
         .as_constraint("Honor unavailability")
     )
@@ -78,11 +94,9 @@ def honor_locked_assignments(factory: ConstraintFactory, **kwargs):
 
 def required_skill(factory: ConstraintFactory, **kwargs):
     """Employee must have required skill for the shift."""
-    # Note: This requires shifts to have a required_skill field
     return (
         factory.for_each(Shift)
         .filter(lambda s: 
-                hasattr(s, 'required_skill') and
                 s.required_skill is not None and 
                 s.employee is not None and
                 s.required_skill not in s.employee.skills)
@@ -98,8 +112,7 @@ def required_skill(factory: ConstraintFactory, **kwargs):
 def balance_hours(factory: ConstraintFactory, weight: int = 100, **kwargs):
     """Penalize deviation from target working hours."""
     return (
-        factory.for_each(Shift)
-        .filter(lambda s: s.employee is not None)
+        _assigned(factory)
         .group_by(
             lambda s: s.employee,
             ConstraintCollectors.sum(lambda s: s.hours)
@@ -115,10 +128,8 @@ def balance_hours(factory: ConstraintFactory, weight: int = 100, **kwargs):
 def honor_preferences(factory: ConstraintFactory, weight: int = 50, **kwargs):
     """Reward assigning preferred time slots."""
     return (
-        factory.for_each(Shift)
-        .filter(lambda s: 
-                s.employee is not None and 
-                s.employee.has_preference(s.start, s.end))
+        _assigned(factory)
+        .filter(lambda s: ((s.employee._preferred_mask >> s._slot) & 1) == 1)
         .reward(HardSoftScore.ONE_SOFT, lambda s: weight)
         .as_constraint("Honor preferences")
     )
@@ -127,12 +138,11 @@ def honor_preferences(factory: ConstraintFactory, weight: int = 50, **kwargs):
 def avoid_consecutive_nights(factory: ConstraintFactory, weight: int = 50, max_consecutive: int = 2, **kwargs):
     """Penalize more than max_consecutive night shifts in a row."""
     return (
-        factory.for_each(Shift)
-        .filter(lambda s: s.employee is not None and s.is_night_shift())
-        .join(Shift,
-              Joiners.equal(lambda s: s.employee),
-              Joiners.equal(lambda s: s.start.date() + timedelta(days=1), lambda s: s.start.date()))
-        .filter(lambda s1, s2: s2.is_night_shift())
+        _assigned(factory)
+        .filter(lambda s: s._is_night)
+        .join(_assigned(factory).filter(lambda s: s._is_night),
+              Joiners.equal(_employee_id),
+              Joiners.equal(lambda s: s._next_date_ord, lambda s: s._date_ord))
         .penalize(HardSoftScore.ONE_SOFT, lambda s1, s2: weight)
         .as_constraint("Avoid consecutive nights")
     )
@@ -141,8 +151,7 @@ def avoid_consecutive_nights(factory: ConstraintFactory, weight: int = 50, max_c
 def fair_shift_distribution(factory: ConstraintFactory, weight: int = 30, **kwargs):
     """Penalize uneven distribution of shifts."""
     return (
-        factory.for_each(Shift)
-        .filter(lambda s: s.employee is not None)
+        _assigned(factory)
         .group_by(
             lambda s: s.employee,
             ConstraintCollectors.count()
@@ -155,6 +164,43 @@ def fair_shift_distribution(factory: ConstraintFactory, weight: int = 30, **kwar
     )
 
 
+def balance_and_fairness(factory: ConstraintFactory, balance_weight: int = 100,
+                         fairness_weight: int = 30, **kwargs):
+    """balance_hours and fair_shift_distribution computed in one group_by pass."""
+    return (
+        _assigned(factory)
+        .group_by(
+            lambda s: s.employee,
+            ConstraintCollectors.compose(
+                ConstraintCollectors.sum(lambda s: s.hours),
+                ConstraintCollectors.count(),
+                lambda total_hours, count: (total_hours, count)
+            )
+        )
+        .penalize(
+            HardSoftScore.ONE_SOFT,
+            lambda emp, totals: (
+                abs(emp.target_working_hours - totals[0]) * balance_weight // 100
+                + totals[1] * totals[1] * fairness_weight // 100
+            )
+        )
+        .as_constraint("Balance hours and fair distribution")
+    )
+
+
+def pair_trainees(factory: ConstraintFactory, weight: int = 50, **kwargs):
+    """Reward a trainee working at the same time as their mentor."""
+    return (
+        _assigned(factory)
+        .filter(lambda s: s.employee.mentor_id is not None)
+        .join(Shift,
+              Joiners.equal(lambda s: s.employee.mentor_id, _employee_id),
+              Joiners.overlapping(lambda s: s.start, lambda s: s.end))
+        .reward(HardSoftScore.ONE_SOFT, lambda s1, s2: weight)
+        .as_constraint("Pair trainees")
+    )
+
+
 # =============================================================================
 # CONSTRAINT LIBRARY REGISTRY
 # =============================================================================
@@ -172,38 +218,74 @@ SOFT_CONSTRAINTS = {
     "honor_preferences": honor_preferences,
     "avoid_consecutive_nights": avoid_consecutive_nights,
     "fair_shift_distribution": fair_shift_distribution,
+    "balance_and_fairness": balance_and_fairness,
+    "pair_trainees": pair_trainees,
+}
+
+# Single lookup table: constraint name -> (builder, "hard" | "soft")
+ALL_CONSTRAINTS = {
+    **{name: (fn, "hard") for name, fn in HARD_CONSTRAINTS.items()},
+    **{name: (fn, "soft") for name, fn in SOFT_CONSTRAINTS.items()},
 }
 
 
+# input_data.json uses camelCase keys; constraint functions take snake_case
+CONFIG_PARAM_NAMES = {
+    "restHours": "rest_hours",
+    "maxConsecutive": "max_consecutive",
+    "balanceWeight": "balance_weight",
+    "fairnessWeight": "fairness_weight",
+}
+
+
+def _fuse_soft_constraints(soft: List[dict]) -> List[dict]:
+    """Replace balance_hours + fair_shift_distribution with balance_and_fairness."""
+    balance = [c for c in soft if c.get("name") == "balance_hours"]
+    fairness = [c for c in soft if c.get("name") == "fair_shift_distribution"]
+    if len(balance) != 1 or len(fairness) != 1:
+        return soft
+    fused = {
+        "name": "balance_and_fairness",
+        "balanceWeight": balance[0].get("weight", 100),
+        "fairnessWeight": fairness[0].get("weight", 30),
+    }
+    return [c for c in soft if c is not balance[0] and c is not fairness[0]] + [fused]
+
+
+def _constraint_kwargs(c: dict) -> dict:
+    """Translate a constraint config entry into keyword arguments."""
+    return {CONFIG_PARAM_NAMES.get(key, key): value for key, value in c.items()}
+
+
 def build_constraint_provider(constraint_config: dict):
     """
     Build a constraint provider function based on config.
     
+    Parameters (weights, rest hours, ...) are resolved once here, so the
+    constraint lambdas close over plain values instead of reading config.
+    balance_hours and fair_shift_distribution share one group_by when both
+    are configured. Callers cache the result per config (see
+    solver._get_solver_factory).
+    
     Args:
         constraint_config: Dict with "hard" and "soft" constraint lists
         
     Returns:
         A constraint_provider decorated function
     """
-    hard_list = constraint_config.get("hard", [])
-    soft_list = constraint_config.get("soft", [])
+    # Hard constraints first, then soft; an entry only counts under its own category
+    entries = (
+        [("hard", c) for c in constraint_config.get("hard", [])]
+        + [("soft", c) for c in _fuse_soft_constraints(constraint_config.get("soft", []))]
+    )
+    builders = []
+    for category, c in entries:
+        registered = ALL_CONSTRAINTS.get(c.get("name"))
+        if registered is not None and registered[1] == category:
+            builders.append((registered[0], _constraint_kwargs(c)))
     
     @constraint_provider
     def define_constraints(factory: ConstraintFactory):
-        constraints = []
-        
-        # Add hard constraints
-        for c in hard_list:
-            name = c.get("name")
-            if name in HARD_CONSTRAINTS:
-                constraints.append(HARD_CONSTRAINTS[name](factory, **c))
-        
-        # Add soft constraints
-        for c in soft_list:
-            name = c.get("name")
-            if name in SOFT_CONSTRAINTS:
-                constraints.append(SOFT_CONSTRAINTS[name](factory, **c))
-        
-        return constraints
+        return [builder(factory, **kwargs) for builder, kwargs in builders]
     
     return define_constraints
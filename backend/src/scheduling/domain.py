@@ -9,9 +9,11 @@ Updated for Timefold 1.24.0 Python API which uses:
 - Annotated[Type, PlanningVariable] for planning variables
 - Annotated[Type, PlanningId] for entity IDs
 """
+from bisect import bisect_left
 from dataclasses import dataclass, field
 from datetime import datetime, date, timedelta
-from typing import List, Optional, Any, Annotated
+from functools import lru_cache
+from typing import List, Optional, Any, Annotated, FrozenSet
 
 from timefold.solver.domain import (
     planning_entity, 
@@ -26,30 +28,114 @@ from timefold.solver.domain import (
 from timefold.solver.score import HardSoftScore
 
 
-@dataclass
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO timestamp; rotas repeat the same shift boundaries a lot."""
+    return datetime.fromisoformat(value)
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_seconds(value: datetime) -> int:
+    """Whole seconds since the epoch; naive datetimes are taken as UTC."""
+    if value.tzinfo is not None:
+        return int(value.timestamp())
+    return (value - _EPOCH) // timedelta(seconds=1)
+
+
+@dataclass(slots=True)
 class TimeSpan:
     """Time span for availability/unavailability."""
     start: datetime
     end: datetime
 
+    # Epoch-second copies of start/end for integer comparisons
+    _start_epoch: int = field(init=False, repr=False, compare=False)
+    _end_epoch: int = field(init=False, repr=False, compare=False)
+
     def __post_init__(self):
         if isinstance(self.start, str):
-            self.start = datetime.fromisoformat(self.start)
+            self.start = _parse_iso(self.start)
         if isinstance(self.end, str):
-            self.end = datetime.fromisoformat(self.end)
+            self.end = _parse_iso(self.end)
+        self._start_epoch = _epoch_seconds(self.start)
+        self._end_epoch = _epoch_seconds(self.end)
 
     def overlaps(self, other_start: datetime, other_end: datetime) -> bool:
-        return max(self.start, other_start) < min(self.end, other_end)
+        return self.overlaps_epoch(_epoch_seconds(other_start), _epoch_seconds(other_end))
 
+    def overlaps_epoch(self, other_start: int, other_end: int) -> bool:
+        """
+        overlaps() for epoch seconds, e.g. Shift._start_epoch/_end_epoch.
+        
+        Same as max(starts) < min(ends): zero-length or inverted intervals
+        never overlap anything.
+        """
+        return (self._start_epoch < other_end and other_start < self._end_epoch
+                and self._start_epoch < self._end_epoch and other_start < other_end)
 
-@dataclass
+
+def _index_spans(spans: List[TimeSpan]):
+    """
+    Build a lookup index for spans sorted by start.
+
+    Returns the sorted starts and the running maximum of ends (as epoch
+    seconds), so a query can bisect on start and stop scanning once no
+    earlier span can reach it.
+    """
+    starts = []
+    max_ends = []
+    max_end = None
+    for ts in spans:
+        starts.append(ts._start_epoch)
+        max_end = ts._end_epoch if max_end is None or ts._end_epoch > max_end else max_end
+        max_ends.append(max_end)
+    return tuple(starts), tuple(max_ends)
+
+
+def _any_overlap(spans, starts, max_ends, other_start: int, other_end: int) -> bool:
+    """Check sorted spans for overlap in O(log k + m) using their index."""
+    i = bisect_left(starts, other_end)
+    while i > 0:
+        i -= 1
+        if max_ends[i] <= other_start:
+            return False
+        if spans[i].overlaps_epoch(other_start, other_end):
+            return True
+    return False
+
+
+def _span_mask(spans: List[TimeSpan], shifts_by_start: List["Shift"],
+               shift_starts: List[int], max_duration: int) -> int:
+    """
+    Bitmask of the shifts overlapping any of the spans.
+    
+    Shifts are sorted by start, so each span bisects to the only window of
+    shifts that can reach it: started before the span ends, and no more than
+    the longest shift duration before it starts.
+    """
+    mask = 0
+    for ts in spans:
+        # Zero-length or inverted spans overlap nothing (see overlaps_epoch)
+        if ts._start_epoch >= ts._end_epoch:
+            continue
+        lo = bisect_left(shift_starts, ts._start_epoch - max_duration)
+        hi = bisect_left(shift_starts, ts._end_epoch, lo)
+        for shift in shifts_by_start[lo:hi]:
+            if ts.overlaps_epoch(shift._start_epoch, shift._end_epoch):
+                mask |= 1 << shift._slot
+    return mask
+
+
+@dataclass(slots=True)
 class Employee:
     """
     Problem fact - employee data (not modified by solver).
     """
     id: str
     name: str
-    skills: List[str] = field(default_factory=list)
+    skills: FrozenSet[str] = field(default_factory=frozenset)
     contracted_hours: int = 160
     owing_hours: int = 0
     paid_absence_hours: int = 0
@@ -58,22 +144,46 @@ class Employee:
     preferred_time_spans: List[TimeSpan] = field(default_factory=list)
     mentor_id: Optional[str] = None
 
+    # Bisect indexes over the span lists, built in __post_init__
+    _unavail_starts: tuple = field(init=False, repr=False, compare=False)
+    _unavail_max_ends: tuple = field(init=False, repr=False, compare=False)
+    _pref_starts: tuple = field(init=False, repr=False, compare=False)
+    _pref_max_ends: tuple = field(init=False, repr=False, compare=False)
+    # Bit i set = the shift in slot i overlaps a span; see index_shift_slots()
+    _unavailable_mask: int = field(default=0, init=False, repr=False, compare=False)
+    _preferred_mask: int = field(default=0, init=False, repr=False, compare=False)
+
     def __post_init__(self):
-        # Convert dicts to TimeSpan objects
-        self.unavailable_time_spans = [
-            TimeSpan(**ts) if isinstance(ts, dict) else ts 
-            for ts in self.unavailable_time_spans
-        ]
-        self.preferred_time_spans = [
-            TimeSpan(**ts) if isinstance(ts, dict) else ts 
-            for ts in self.preferred_time_spans
-        ]
+        # Frozenset for O(1) membership tests in the required_skill constraint
+        self.skills = frozenset(self.skills)
+        # Convert dicts to TimeSpan objects, sorted by start for bisect lookups.
+        # Only start/end are read so extra keys (e.g. "reason") are ignored.
+        self.unavailable_time_spans = sorted(
+            (TimeSpan(ts["start"], ts["end"]) if isinstance(ts, dict) else ts
+             for ts in self.unavailable_time_spans),
+            key=lambda ts: ts.start
+        )
+        self.preferred_time_spans = sorted(
+            (TimeSpan(ts["start"], ts["end"]) if isinstance(ts, dict) else ts
+             for ts in self.preferred_time_spans),
+            key=lambda ts: ts.start
+        )
+        self._unavail_starts, self._unavail_max_ends = _index_spans(self.unavailable_time_spans)
+        self._pref_starts, self._pref_max_ends = _index_spans(self.preferred_time_spans)
 
     def is_unavailable(self, shift_start: datetime, shift_end: datetime) -> bool:
-        return any(ts.overlaps(shift_start, shift_end) for ts in self.unavailable_time_spans)
+        return self.is_unavailable_epoch(_epoch_seconds(shift_start), _epoch_seconds(shift_end))
 
     def has_preference(self, shift_start: datetime, shift_end: datetime) -> bool:
-        return any(ts.overlaps(shift_start, shift_end) for ts in self.preferred_time_spans)
+        return self.has_preference_epoch(_epoch_seconds(shift_start), _epoch_seconds(shift_end))
+
+    def is_unavailable_epoch(self, start: int, end: int) -> bool:
+        return _any_overlap(self.unavailable_time_spans, self._unavail_starts,
+                            self._unavail_max_ends, start, end)
+
+    def has_preference_epoch(self, start: int, end: int) -> bool:
+        return _any_overlap(self.preferred_time_spans, self._pref_starts,
+                            self._pref_max_ends, start, end)
 
     def __hash__(self):
         return hash(self.id)
@@ -85,11 +195,14 @@ class Employee:
 
 
 @planning_entity
-@dataclass
+@dataclass(eq=False)
 class Shift:
     """
     Planning entity - the solver assigns an employee to each shift.
     Uses Annotated types for Timefold 1.24.0 API.
+    
+    Compared and hashed by identity: parse_schedule creates one instance
+    per shift id, and Timefold tracks entities through PlanningId.
     """
     id: Annotated[str, PlanningId]
     code: str
@@ -97,37 +210,53 @@ class Shift:
     end: datetime
     hours: int
     locked_employee_id: Optional[str] = None  # Pre-assigned (hard constraint)
+    required_skill: Optional[str] = None  # Checked by the required_skill constraint
     
     # Planning variable - this is what the solver optimizes
     employee: Annotated[Optional[Employee], PlanningVariable] = field(default=None)
 
+    # Derived from start/end in __post_init__ so constraint lambdas read an
+    # int/bool attribute instead of doing datetime arithmetic per tuple
+    _date: date = field(init=False, repr=False, compare=False)
+    _date_str: str = field(init=False, repr=False, compare=False)  # "YYYY-MM-DD" for output
+    _date_ord: int = field(init=False, repr=False, compare=False)
+    _next_date_ord: int = field(init=False, repr=False, compare=False)
+    _start_epoch: int = field(init=False, repr=False, compare=False)
+    _end_epoch: int = field(init=False, repr=False, compare=False)
+    _is_night: bool = field(init=False, repr=False, compare=False)
+    _is_morning: bool = field(init=False, repr=False, compare=False)
+    _duration_hours: float = field(init=False, repr=False, compare=False)
+    # Position in ShiftSchedule.shifts, set by ShiftSchedule.index_shift_slots()
+    _slot: int = field(default=0, init=False, repr=False, compare=False)
+
     def __post_init__(self):
         if isinstance(self.start, str):
-            self.start = datetime.fromisoformat(self.start)
+            self.start = _parse_iso(self.start)
         if isinstance(self.end, str):
-            self.end = datetime.fromisoformat(self.end)
+            self.end = _parse_iso(self.end)
+        self._date = self.start.date()
+        self._date_str = self._date.isoformat()
+        self._date_ord = self._date.toordinal()
+        self._next_date_ord = self._date_ord + 1
+        self._start_epoch = _epoch_seconds(self.start)
+        self._end_epoch = _epoch_seconds(self.end)
+        self._is_night = self.end.date() > self._date or self.start.hour >= 22
+        self._is_morning = self.start.hour < 12
+        self._duration_hours = (self._end_epoch - self._start_epoch) / 3600
 
     def get_date(self) -> date:
-        return self.start.date()
+        return self._date
 
     def get_duration_hours(self) -> float:
-        return (self.end - self.start).total_seconds() / 3600
+        return self._duration_hours
 
     def is_night_shift(self) -> bool:
         """Check if this is a night shift (crosses midnight or starts late)."""
-        return self.end.date() > self.start.date() or self.start.hour >= 22
+        return self._is_night
 
     def is_morning_shift(self) -> bool:
         """Check if this starts in the morning."""
-        return self.start.hour < 12
-
-    def __hash__(self):
-        return hash(self.id)
-
-    def __eq__(self, other):
-        if not isinstance(other, Shift):
-            return NotImplemented
-        return self.id == other.id
+        return self._is_morning
 
 
 @planning_solution
@@ -150,6 +279,32 @@ class ShiftSchedule:
     # Score
     score: Annotated[HardSoftScore, PlanningScore] = field(default=None)
 
+    def __post_init__(self):
+        # Constraints rely on unique slots and the masks, however the schedule is built
+        self.index_shift_slots()
+
+    def index_shift_slots(self) -> None:
+        """
+        Number the shifts and precompute each employee's availability masks.
+        
+        Shifts and spans are fixed for a solve, so the overlap checks run once
+        here and the constraints only test one bit per shift. Each span is
+        matched against shifts sorted by start, so the work scales with the
+        number of spans rather than employees x shifts.
+        
+        Runs on construction; call it again after changing shifts or employees.
+        """
+        for slot, shift in enumerate(self.shifts):
+            shift._slot = slot
+        shifts_by_start = sorted(self.shifts, key=lambda s: s._start_epoch)
+        shift_starts = [s._start_epoch for s in shifts_by_start]
+        max_duration = max((s._end_epoch - s._start_epoch for s in shifts_by_start), default=0)
+        for employee in self.employees:
+            employee._unavailable_mask = _span_mask(
+                employee.unavailable_time_spans, shifts_by_start, shift_starts, max_duration)
+            employee._preferred_mask = _span_mask(
+                employee.preferred_time_spans, shifts_by_start, shift_starts, max_duration)
+
     def get_min_nurses_per_shift(self) -> int:
         return self.config.get("minNursesPerShift", 1)
 
@@ -3,18 +3,21 @@ JSON Utilities for Nurse Scheduling
 
 Parse input_data.json and format output for frontend.
 """
-import json
+from collections import defaultdict
 from datetime import datetime
 from typing import List, Dict, Any
 from pathlib import Path
 
+import orjson
+
 from .domain import Employee, Shift, ShiftSchedule, TimeSpan
 
 
 def load_input_data(file_path: str) -> dict:
     """Load input data from JSON file."""
-    with open(file_path, 'r') as f:
-        return json.load(f)
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw)
 
 
 def parse_schedule(data: dict) -> ShiftSchedule:
@@ -27,12 +30,9 @@ def parse_schedule(data: dict) -> ShiftSchedule:
     Returns:
         ShiftSchedule ready for solving
     """
-    # Parse employees
-    employees = []
-    employee_lookup = {}
-    
-    for emp_data in data.get("employees", []):
-        employee = Employee(
+    # Parse employees, keyed by id for locked-shift lookups
+    employee_lookup = {
+        emp_data["id"]: Employee(
             id=emp_data["id"],
             name=emp_data.get("name", emp_data["id"]),
             skills=emp_data.get("skills", []),
@@ -44,26 +44,24 @@ def parse_schedule(data: dict) -> ShiftSchedule:
             preferred_time_spans=emp_data.get("preferredTimeSpans", []),
             mentor_id=emp_data.get("mentorId"),
         )
-        employees.append(employee)
-        employee_lookup[employee.id] = employee
+        for emp_data in data.get("employees", [])
+    }
+    employees = list(employee_lookup.values())
     
-    # Parse shifts
-    shifts = []
-    for shift_data in data.get("shifts", []):
-        shift = Shift(
+    # Parse shifts, pre-assigning locked shifts (hard constraint) as they are built
+    shifts = [
+        Shift(
             id=shift_data["id"],
             code=shift_data.get("code", "M"),
             start=shift_data["start"],
             end=shift_data["end"],
             hours=shift_data.get("hours", 8),
             locked_employee_id=shift_data.get("lockedEmployeeId"),
+            required_skill=shift_data.get("requiredSkill"),
+            employee=employee_lookup.get(shift_data.get("lockedEmployeeId")),
         )
-        
-        # Pre-assign locked shifts
-        if shift.locked_employee_id and shift.locked_employee_id in employee_lookup:
-            shift.employee = employee_lookup[shift.locked_employee_id]
-        
-        shifts.append(shift)
+        for shift_data in data.get("shifts", [])
+    ]
     
     return ShiftSchedule(
         employees=employees,
@@ -83,26 +81,27 @@ def format_output(schedule: ShiftSchedule) -> dict:
     Returns:
         JSON dict for frontend
     """
-    # Build schedule array
+    # Only assigned shifts are output, so only those are sorted
+    assigned_shifts = sorted(
+        (s for s in schedule.shifts if s.employee is not None),
+        key=lambda s: (s.start, s.id)
+    )
+    
+    # Build schedule array and track hours in one pass
     schedule_list = []
-    employee_hours = {}
+    employee_hours = defaultdict(int)
     
-    for shift in sorted(schedule.shifts, key=lambda s: (s.start, s.id)):
-        if shift.employee:
-            schedule_list.append({
-                "date": shift.start.strftime("%Y-%m-%d"),
-                "employeeId": shift.employee.id,
-                "employeeName": shift.employee.name,
-                "shiftCode": shift.code,
-            })
-            
-            # Track hours
-            if shift.employee.name not in employee_hours:
-                employee_hours[shift.employee.name] = 0
-            employee_hours[shift.employee.name] += shift.hours
+    for shift in assigned_shifts:
+        schedule_list.append({
+            "date": shift._date_str,
+            "employeeId": shift.employee.id,
+            "employeeName": shift.employee.name,
+            "shiftCode": shift.code,
+        })
+        employee_hours[shift.employee.name] += shift.hours
     
     # Count assignments
-    assigned = sum(1 for s in schedule.shifts if s.employee is not None)
+    assigned = len(schedule_list)
     unassigned = len(schedule.shifts) - assigned
     
     return {
@@ -113,6 +112,6 @@ def format_output(schedule: ShiftSchedule) -> dict:
             "totalShifts": len(schedule.shifts),
             "assignedShifts": assigned,
             "unassignedShifts": unassigned,
-            "employeeHours": employee_hours,
+            "employeeHours": dict(employee_hours),
         }
     }
@@ -12,12 +12,17 @@ This tool uses:
 
 The solver reads input_data.json and returns frontend-ready schedule JSON.
 """
+import json
+import logging
+
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
 from src.scheduling import run_solver
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 
 class SolverInput(BaseModel):
     """Input schema for the Timefold solver tool."""
@@ -41,21 +46,26 @@ class TimefoldSolverTool(BaseTool):
     )
     args_schema: Type[BaseModel] = SolverInput
 
-    def _run(self, file_path: str) -> dict:
-        """Run the Timefold solver on the input file."""
+    def _run(self, file_path: str) -> str:
+        """
+        Run the Timefold solver on the input file.
+        
+        Returns compact JSON text: CrewAI passes tool output to the LLM with
+        str(), and a dict repr is single-quoted and costs more tokens.
+        """
         try:
             # Validate file exists
             if not Path(file_path).exists():
-                return {
+                return json.dumps({
                     "status": "error", 
                     "error": f"Input file not found: {file_path}"
-                }
+                })
             
-            print(f"🔧 Tool: Running Timefold solver on {file_path}...")
+            logger.info("🔧 Tool: Running Timefold solver on %s...", file_path)
             result = run_solver(file_path, time_limit=30)
-            print(f"✅ Solver complete. Score: {result.get('score', 'N/A')}")
-            return result
+            logger.info("✅ Solver complete. Score: %s", result.get('score', 'N/A'))
+            return json.dumps(result, separators=(",", ":"), default=str)
             
         except Exception as e:
-            print(f"❌ Solver error: {e}")
-            return {"status": "error", "error": str(e)}
+            logger.exception("❌ Solver error: %s", e)
+            return json.dumps({"status": "error", "error": str(e)})
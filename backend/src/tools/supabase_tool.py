@@ -7,6 +7,7 @@ from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
 from supabase import create_client
+import json
 import os
 from dotenv import load_dotenv
 
@@ -25,6 +26,13 @@ def get_client():
     return _client
 
 
+def _as_json(value) -> str:
+    """Compact JSON for nested fields; plain strings are passed through."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
 class RotaIdInput(BaseModel):
     """Input for fetching rota data."""
     rota_id: str = Field(description="The UUID of the rota configuration")
@@ -43,22 +51,18 @@ class FetchRotaDataTool(BaseTool):
         """Fetch rota and unit data from Supabase."""
         client = get_client()
         
-        # Fetch rota config
-        rota = client.table("rotas_config").select("*").eq("id", rota_id).single().execute()
+        # Fetch rota config with its unit (and staff) embedded in one request
+        rota = client.table("rotas_config").select("*, units(*)").eq("id", rota_id).single().execute()
         
         if not rota.data:
             return f"Error: Rota not found for id {rota_id}"
         
         rota_data = rota.data
+        unit_data = rota_data.pop("units", None)
         
-        # Fetch unit with staff
-        unit = client.table("units").select("*").eq("id", rota_data["unit_id"]).single().execute()
-        
-        if not unit.data:
+        if not unit_data:
             return f"Error: Unit not found for id {rota_data['unit_id']}"
         
-        unit_data = unit.data
-        
         # Combine and format the data
         result = f"""
 === ROTA CONFIGURATION ===
@@ -67,13 +71,13 @@ Unit: {rota_data['unit_name']}
 Period: {rota_data['start_date']} to {rota_data['end_date']}
 
 Staff Target Hours (goal for this month):
-{rota_data['staff_target_hours']}
+{_as_json(rota_data['staff_target_hours'])}
 
 Staff Owing Hours (balance from previous month):
-{rota_data['staff_owing_hours']}
+{_as_json(rota_data['staff_owing_hours'])}
 
 Special Requests (pre-filled shifts):
-{rota_data['special_requests']}
+{_as_json(rota_data['special_requests'])}
 
 Comments: {rota_data.get('comments', 'None')}
 
@@ -84,12 +88,12 @@ Manager: {unit_data.get('manager', 'N/A')}
 Min Nurses Per Shift: {unit_data.get('min_nurses_per_shift', 2)}
 
 Rules:
-{unit_data.get('rules', 'No specific rules')}
+{_as_json(unit_data.get('rules', 'No specific rules'))}
 
 === STAFF MEMBERS ===
-{unit_data['staff']}
+{_as_json(unit_data['staff'])}
 
 === SHIFT CODES ===
-{unit_data['shift_codes']}
+{_as_json(unit_data['shift_codes'])}
 """
         return result
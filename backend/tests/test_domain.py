@@ -0,0 +1,76 @@
+"""
+Tests for the scheduling domain model (availability spans and masks).
+"""
+import pytest
+
+pytest.importorskip("timefold")
+
+try:
+    from src.scheduling.domain import Employee, Shift, ShiftSchedule, TimeSpan
+    from src.scheduling.json_utils import parse_schedule
+except Exception as e:
+    # timefold imports without Java; the domain decorators need a JVM (17+)
+    if type(e).__name__ != "InvalidJVMVersionError":
+        raise
+    pytest.skip(f"Timefold needs a JVM: {e}", allow_module_level=True)
+
+
+def test_zero_length_span_overlaps_nothing():
+    span = TimeSpan("2026-02-01T22:00:00", "2026-02-01T22:00:00")
+    shift = Shift(id="s1", code="N", start="2026-02-01T21:30:00",
+                  end="2026-02-01T22:30:00", hours=1)
+
+    assert not span.overlaps(shift.start, shift.end)
+    assert not span.overlaps_epoch(shift._start_epoch, shift._end_epoch)
+
+
+def test_zero_length_span_sets_no_mask_bits():
+    schedule = parse_schedule({
+        "employees": [{
+            "id": "e1",
+            "unavailableTimeSpans": [
+                {"start": "2026-02-01T22:00:00", "end": "2026-02-01T22:00:00"}
+            ],
+            "preferredTimeSpans": [
+                {"start": "2026-02-01T22:00:00", "end": "2026-02-01T22:00:00"}
+            ],
+        }],
+        "shifts": [
+            {"id": "s1", "start": "2026-02-01T21:30:00", "end": "2026-02-01T22:30:00"},
+        ],
+    })
+    employee = schedule.employees[0]
+
+    assert not employee.is_unavailable(schedule.shifts[0].start, schedule.shifts[0].end)
+    assert employee._unavailable_mask == 0
+    assert employee._preferred_mask == 0
+
+
+def test_direct_construction_numbers_shift_slots():
+    shifts = [
+        Shift(id=f"s{i}", code="M", start=f"2026-02-0{i + 1}T07:00:00",
+              end=f"2026-02-0{i + 1}T15:00:00", hours=8)
+        for i in range(3)
+    ]
+    ShiftSchedule(employees=[], shifts=shifts)
+
+    assert [s._slot for s in shifts] == [0, 1, 2]
+
+
+def test_direct_construction_builds_availability_masks():
+    employee = Employee(
+        id="e1",
+        name="e1",
+        unavailable_time_spans=[{"start": "2026-02-02T00:00:00", "end": "2026-02-03T00:00:00"}],
+        preferred_time_spans=[{"start": "2026-02-03T00:00:00", "end": "2026-02-04T00:00:00"}],
+    )
+    shifts = [
+        Shift(id=f"s{i}", code="M", start=f"2026-02-0{i + 1}T07:00:00",
+              end=f"2026-02-0{i + 1}T15:00:00", hours=8)
+        for i in range(3)
+    ]
+    ShiftSchedule(employees=[employee], shifts=shifts)
+
+    # Only the second shift is unavailable and only the third is preferred
+    assert employee._unavailable_mask == 0b010
+    assert employee._preferred_mask == 0b100